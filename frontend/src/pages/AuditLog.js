@@ -105,7 +105,7 @@ export default function AuditLog() {
                     <div className="flex items-start gap-2">
                       <Hash className="w-4 h-4 text-slate-500 mt-1" />
                       <div className="flex-1">
-                        <div className="text-xs text-slate-500 mb-1">Bid Hash (SHA-3-512)</div>
+                        <div className="text-xs text-slate-500 mb-1">Bid Hash (SHA-256)</div>
                         <div className="font-mono text-xs bg-slate-50 p-2 rounded break-all">
                           {entry.bidHash}
                         </div>
@@ -69,7 +69,7 @@ export default function UploadBid() {
             <Lock className="w-10 h-10 text-emerald-600" />
             Bid Sealing Engine
           </h1>
-          <p className="text-slate-600">Encrypt and seal your bid with AES-256 and SHA-3-512 hashing</p>
+          <p className="text-slate-600">Encrypt and seal your bid with AES-256-GCM and SHA-256 hashing</p>
         </div>
 
         <Card data-testid="seal-bid-card" className="shadow-lg">
@@ -154,7 +154,7 @@ export default function UploadBid() {
                         <p className="font-mono text-xs bg-white p-2 rounded mt-1 break-all">{result.bidderId}</p>
                       </div>
                       <div>
-                        <span className="font-medium text-slate-700">Bid Hash (SHA-3-512):</span>
+                        <span className="font-medium text-slate-700">Bid Hash (SHA-256):</span>
                         <p className="font-mono text-xs bg-white p-2 rounded mt-1 break-all">{result.bidHash}</p>
                       </div>
                     </div>